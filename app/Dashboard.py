@@ -4,9 +4,9 @@ import requests
 import datetime
 import streamlit as st
 import firebase_admin
-from firebase_admin import credentials, firestore, auth
+from firebase_admin import credentials, auth
 from dotenv import load_dotenv
-from utils import show_footer, custom_css
+from utils import show_footer, custom_css, get_db
 
 # Configure Streamlit page settings
 st.set_page_config(
@@ -19,12 +19,30 @@ st.set_page_config(
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize Firebase
-if not firebase_admin._apps:
-    cred = credentials.Certificate("firebase-config.json")
-    firebase_admin.initialize_app(cred)
-
-database = firestore.client()
+# Keep-alive HTTP session so Firebase REST calls reuse one TLS connection
+# to identitytoolkit.googleapis.com instead of handshaking per request.
+# Held in cache_resource because Streamlit re-executes this script in a
+# fresh namespace on every rerun — a module-level Session would be rebuilt
+# each time and never reuse anything.
+@st.cache_resource
+def get_session():
+    session = requests.Session()
+    # Identity Toolkit responses compress well; ask for gzip explicitly so
+    # the answer arrives compressed even if a proxy strips the library default
+    session.headers["Accept-Encoding"] = "gzip"
+    return session
+
+# Initialize Firebase once per process: the service-account JSON is parsed
+# a single time and every session shares the cached client from utils
+@st.cache_resource
+def init_firebase():
+    if not firebase_admin._apps:
+        cred = credentials.Certificate("firebase-config.json")
+        firebase_admin.initialize_app(cred)
+    return get_db()
+
+
+database = init_firebase()
 
 custom_css()
 
@@ -252,14 +270,20 @@ def reset_password():
 
             with st.spinner("Processing request..."):
                 try:
-                    response = requests.post(url, json=payload)
+                    # Bounded connect/read timeouts so a hung endpoint can't
+                    # stall the Streamlit worker indefinitely
+                    response = get_session().post(url, json=payload, timeout=(3, 10))
 
-                    if response.status_code == 200:
+                    if response.ok:
                         st.success("✅ Password reset email sent!")
                         st.info(f"Please check {email} for the reset link (including spam folder)")
                     else:
-                        error_data = response.json()
-                        error_message = error_data.get("error", {}).get("message", "Unknown error")
+                        # Only parse the body on failure, and tolerate
+                        # non-JSON error responses
+                        try:
+                            error_message = response.json().get("error", {}).get("message", "Unknown error")
+                        except ValueError:
+                            error_message = response.text[:200] or "Unknown error"
 
                         if error_message == "EMAIL_NOT_FOUND":
                             st.error("No account found with this email address")
@@ -321,9 +345,13 @@ def reset_email():
                         # Update Firestore document
                         doctor_data["email"] = new_email
 
-                        # Update Firestore document with new email and delete old one
-                        database.collection("doctors").document(new_email).set(doctor_data)
-                        database.collection("doctors").document(current_email).delete()
+                        # Update Firestore document with new email and delete old
+                        # one in a single atomic batch (one round-trip, and no
+                        # window where both or neither document exists)
+                        batch = database.batch()
+                        batch.set(database.collection("doctors").document(new_email), doctor_data)
+                        batch.delete(database.collection("doctors").document(current_email))
+                        batch.commit()
 
                         # Update session state
                         st.session_state["doctor_email"] = new_email
@@ -1,11 +1,9 @@
-import json
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
-from firebase_admin import firestore
 from cloudinary.uploader import upload, destroy
 from cloudinary.utils import cloudinary_url
-from utils import format_date, show_footer, generate_pdf, render_chart, get_currency_symbol, configure_cloudinary
+from utils import format_date, show_footer, generate_pdf, render_chart, get_currency_symbol, configure_cloudinary, get_db, load_dental_data
 
 # Initialize session state variables to track patient status and treatment records
 if "patient_status" not in st.session_state:
@@ -14,7 +12,7 @@ if "patient_status" not in st.session_state:
 if "treatment_record" not in st.session_state:
     st.session_state.treatment_record = []
 
-database = firestore.client()
+database = get_db()
 
 
 def fetch_patient(doctor_email, identifier, search_by="id"):
@@ -120,9 +118,9 @@ def main():
     doctor_email = st.session_state.get("doctor_email")
     doctor_settings = load_settings(doctor_email)
 
-    # Load dental chart data from config file (teeth map and teeth rows)
-    with open("app/data.json", "r") as file:
-        dental_data = json.load(file)
+    # Load dental chart data from config file (teeth map and teeth rows);
+    # cached so reruns skip the disk read + JSON parse
+    dental_data = load_dental_data()
 
     # Merge doctor's treatment procedures and price estimates with dental_data
     dental_data["treatment_procedures"] = doctor_settings.get("treatment_procedures", ["Cleaning"])
@@ -808,24 +806,20 @@ def main():
                             # Get patient's X-ray images if selected
                             patient_xrays = get_patient_xrays(doctor_email, file_id) if include_images else []
 
-                            # Generate PDF report with treatment details, cost summary and X-rays (if selected)
-                            pdf_path = generate_pdf(
-                                st.session_state.get("doctor_name", "Doctor"),
-                                patient_info["name"] or "Unknown Patient",
-                                st.session_state.treatment_record,
-                                currency_symbol,
-                                discount_calculation,
-                                tax_calculation,
-                                total_price,
-                                patient_xrays
-                            )
-
-                            # Read generated PDF for download
-                            with open(pdf_path, "rb") as file_handler:
-                                pdf_content = file_handler.read()
-
-                            # Create download button for the PDF file
-                            file_name = f"{patient_info['name'] or 'unknown'}_treatment_plan.pdf"
+                            # Generate PDF report with treatment details, cost summary
+                            # and X-rays (if selected); generate_pdf downloads the
+                            # images on its own worker pool
+                            with st.spinner("Generating treatment report..."):
+                                file_name, pdf_content = generate_pdf(
+                                    st.session_state.get("doctor_name", "Doctor"),
+                                    patient_info["name"] or "Unknown Patient",
+                                    st.session_state.treatment_record,
+                                    currency_symbol,
+                                    discount_calculation,
+                                    tax_calculation,
+                                    total_price,
+                                    patient_xrays
+                                )
                             st.download_button(
                                 label="Download Treatment Report",
                                 use_container_width=True,
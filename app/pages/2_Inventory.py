@@ -1,4 +1,5 @@
 import os
+import re
 import smtplib
 import streamlit as st
 import pandas as pd
@@ -6,11 +7,14 @@ import plotly.express as px
 from datetime import datetime
 from firebase_admin import firestore
 from dotenv import load_dotenv
-from utils import format_date, show_footer
+from utils import format_date, show_footer, get_db
 
 load_dotenv()
 
-database = firestore.client()
+# Precompiled once at import so form submits don't re-parse the pattern
+_EMAIL_RE = re.compile(r"^[\w.-]+@[\w.-]+\.\w+$")
+
+database = get_db()
 doctor_email = st.session_state["doctor_email"] if "doctor_email" in st.session_state else None
 stock_collection = database.collection("doctors").document(doctor_email).collection("stock") if doctor_email else None
 
@@ -544,7 +548,7 @@ def display_alerts():
 
             with col2:
                 if st.button("Update Email", use_container_width=True):
-                    if not alert_email or "@" not in alert_email:
+                    if not alert_email or not _EMAIL_RE.match(alert_email):
                         st.error("Please enter a valid email address")
                     else:
                         # Save the new alert email to session state
@@ -566,7 +570,7 @@ def display_alerts():
 
             # Add a button to manually send test alert
             if st.button("Send Test Alert", use_container_width=True):
-                if not alert_email or "@" not in alert_email:
+                if not alert_email or not _EMAIL_RE.match(alert_email):
                     st.error("Please enter a valid email address")
                 elif expiry_items:
                     try:
@@ -673,20 +677,26 @@ def display_reports():
                 )
                 st.plotly_chart(fig2, use_container_width=True)
 
-        # Add pie chart for inventory distribution
+        # Add treemap for inventory distribution
         if len(inventory_data) > 0:
             st.subheader("Inventory Distribution")
 
-            # For pie chart, use the display name with formatted date
-            fig3 = px.pie(
-                viz_df,
+            # Limit the treemap to the 20 largest items and group the rest as "Other"
+            # so the chart stays readable (and cheap to render) on large inventories
+            top_items_df = viz_df.nlargest(20, "Quantity")[["Display Name", "Quantity"]]
+            other_quantity = viz_df["Quantity"].sum() - top_items_df["Quantity"].sum()
+            if other_quantity > 0:
+                top_items_df = pd.concat([
+                    top_items_df,
+                    pd.DataFrame([{"Display Name": "Other", "Quantity": other_quantity}])
+                ], ignore_index=True)
+
+            fig3 = px.treemap(
+                top_items_df,
+                path=["Display Name"],
                 values="Quantity",
-                names="Display Name",
-                title="Inventory Distribution by Item",
-                hole=0.4
+                title="Inventory Distribution by Item"
             )
-            # Make the chart responsive to varying display sizes
-            fig3.update_traces(textposition='inside', textinfo='percent+label')
             # Set margins to give the chart more room
             fig3.update_layout(margin=dict(t=50, b=50))
 
@@ -1,5 +1,5 @@
 import streamlit as st
-from utils import show_footer
+from utils import show_footer, clear_doctor_session
 
 def chat():
     st.title("Dental Scheduling System")
@@ -8,7 +8,7 @@ def chat():
 
     with st.sidebar:
         if st.button("Logout", use_container_width=True):
-            st.session_state.clear()
+            clear_doctor_session()
             st.rerun()
 
 
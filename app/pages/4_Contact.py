@@ -1,10 +1,21 @@
+import logging
 import os
+import queue
 import smtplib
+import threading
+import time
 import streamlit as st
 from dotenv import load_dotenv
-from utils import show_footer
+from utils import show_footer, clear_doctor_session
 
-load_dotenv()
+# Page scripts run in a fresh namespace on every rerun, so a module-level
+# load_dotenv() would re-read .env each time; cache_resource makes the env
+# load and credential lookup happen once per process
+@st.cache_resource
+def get_mail_credentials():
+    """Return the (email, password) pair used for SMTP delivery."""
+    load_dotenv()
+    return os.getenv("ADMIN_EMAIL"), os.getenv("ADMIN_PASSWORD")
 
 
 def contact_us():
@@ -13,7 +24,7 @@ def contact_us():
 
     with st.sidebar:
         if st.button("Logout", use_container_width=True):
-            st.session_state.clear()
+            clear_doctor_session()
             st.rerun()
 
     with st.form("contact_form"):
@@ -35,40 +46,82 @@ def contact_us():
                 st.warning("Please fill in all the fields", icon="⚠️")
             else:
                 # Attempt to send email and show appropriate feedback
-                result = send_mail(name, email, message)
-                if "successfully" in result:
+                if send_mail(name, email, message):
                     st.success("Thank you! We've received your message and will get back to you soon 🙂", icon="✅")
                 else:
                     st.error("Error occurred while sending the email", icon="❌")
 
 
-def send_mail(name, email, message):
-    # Get email credentials from environment variables
-    ADMIN_EMAIL = os.getenv("ADMIN_EMAIL")
-    ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD")
-
+@st.cache_resource
+def get_smtp():
+    """Return a pooled SMTP connection so repeat submits skip the TLS+AUTH handshake."""
+    admin_email, admin_password = get_mail_credentials()
+    server = smtplib.SMTP("smtp.gmail.com", 587)
+    server.starttls()  # Enable encryption
+    server.login(user=admin_email, password=admin_password)
+    return server
+
+
+@st.cache_resource
+def get_mail_queue():
+    """Start the background mail worker and return the queue it drains."""
+    mail_queue = queue.Queue()
+    threading.Thread(target=_mail_worker, args=(mail_queue,), daemon=True).start()
+    return mail_queue
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _mail_worker(mail_queue):
+    """Deliver queued contact messages without blocking the Streamlit rerun."""
+    while True:
+        name, email, message = mail_queue.get()
+        try:
+            # Retry transient SMTP failures with a short backoff; the sender
+            # was already acknowledged, so a message that still fails after
+            # the last attempt is logged for the operator rather than dropped
+            for attempt in range(3):
+                try:
+                    _deliver_mail(name, email, message)
+                    break
+                except Exception:
+                    if attempt == 2:
+                        raise
+                    time.sleep(2 ** attempt)
+        except Exception:
+            _LOGGER.exception("Contact mail delivery failed for %s", email)
+        finally:
+            mail_queue.task_done()
+
+
+def _deliver_mail(name, email, message):
     # Prepare email content
     subject = "Dentist Friend Feedback Team"
     body = f"Hello {name},\n\nThank you for reaching out to Dentist Friend! Below is a copy of your message:\n\n{message}"
     full_message = f"Subject: {subject}\n\n{body}"
 
+    # Reuse the pooled SMTP connection, reconnecting once if it has gone stale
+    server = get_smtp()
+    try:
+        server.noop()
+    except (smtplib.SMTPServerDisconnected, smtplib.SMTPException):
+        get_smtp.clear()
+        server = get_smtp()
+
+    # Send to the user and the admin team in a single SMTP transaction
+    # (multiple RCPT TO on one DATA exchange instead of two round-trips)
+    recipients = [email, "noordentist@gmail.com", "areebahmed0709@gmail.com"]
+    server.sendmail(from_addr=get_mail_credentials()[0], to_addrs=recipients, msg=full_message)
+
+
+def send_mail(name, email, message):
+    """Queue the contact message for background delivery and return immediately."""
     try:
-        # Connect to Gmail SMTP server
-        server = smtplib.SMTP("smtp.gmail.com", 587)
-        server.starttls()  # Enable encryption
-        server.login(user=ADMIN_EMAIL, password=ADMIN_PASSWORD)
-
-        # Send confirmation email to user
-        server.sendmail(from_addr=ADMIN_EMAIL, to_addrs=email, msg=full_message)
-
-        # Forward message to admin team
-        server.sendmail(from_addr=ADMIN_EMAIL, to_addrs=["noordentist@gmail.com", "areebahmed0709@gmail.com"], msg=full_message)
-
-        # Close the connection
-        server.quit()
-        return "Email sent successfully"
-    except Exception as e:
-        return str(e)
+        get_mail_queue().put((name, email, message))
+        return True
+    except Exception:
+        return False
 
 
 contact_us()
@@ -1,11 +1,49 @@
+import copy
 import json
+import pandas as pd
 import streamlit as st
-from firebase_admin import firestore
-from utils import show_footer, get_currency_symbol
+from utils import show_footer, get_currency_symbol, get_db, clear_doctor_session
 
-# Load default data from JSON file
-with open("app/data.json", "r") as file:
-    default_data = json.load(file)
+# Settings seeded for a doctor on first login, built once at module scope
+DEFAULT_SETTINGS = {
+    "treatment_procedures": ["Cleaning"],
+    "price_estimates": {"Cleaning": 100},
+    "health_conditions": ["Healthy"],
+    "condition_colors": {"Healthy": "#4CAF50"},
+    "currency": "SAR"
+}
+
+# Supported currencies, hoisted so the dict and key list are built once
+# instead of on every rerun of the currency tab
+CURRENCY_OPTIONS = {
+    "SAR": "Saudi Riyal (SAR)",
+    "INR": "Indian Rupee (₹)"
+}
+CURRENCY_KEYS = tuple(CURRENCY_OPTIONS)
+
+# Static dental notation reference, precompiled into one markdown block so
+# each rerun sends a single element to the frontend instead of several
+FDI_NOTATION_MD = """
+#### FDI World Dental Federation Notation (ISO 3950)
+
+This application uses the FDI (Fédération Dentaire Internationale) notation system, also known as ISO 3950.
+
+This two-digit system divides the mouth into four quadrants:
+- Upper Right (1): teeth 18-11
+- Upper Left (2): teeth 21-28
+- Lower Right (4): teeth 48-41
+- Lower Left (3): teeth 31-38
+
+The first digit indicates the quadrant, while the second digit indicates the tooth position from the midline.
+
+**Upper Jaw**
+
+18 17 16 15 14 13 12 11 | 21 22 23 24 25 26 27 28
+
+**Lower Jaw**
+
+48 47 46 45 44 43 42 41 | 31 32 33 34 35 36 37 38
+"""
 
 
 def main():
@@ -18,63 +56,112 @@ def main():
 
     with st.sidebar:
         if st.button("Logout", use_container_width=True):
-            st.session_state.clear()
+            clear_doctor_session()
             st.rerun()
 
-    database = firestore.client()
+    database = get_db()
     doctor_email = st.session_state.get("doctor_email")
-    doctor_settings = load_settings(database, doctor_email)
-
-    # Create tabs for different setting categories
-    tab1, tab2, tab3, tab4 = st.tabs(["Treatment Procedures", "Dental Chart", "Currency Settings", "Profile Settings"])
+    try:
+        doctor_settings = load_settings(database, doctor_email)
+    except Exception as e:
+        st.error(f"Settings load failed: {e}")
+        return
 
-    with tab1:
+    # Radio-driven dispatch instead of st.tabs: tabs render every body on
+    # each rerun, while this only executes the section being viewed
+    active_tab = st.radio(
+        "Settings section",
+        ["Treatment Procedures", "Dental Chart", "Currency Settings", "Profile Settings"],
+        horizontal=True,
+        key="active_tab",
+        label_visibility="collapsed"
+    )
+
+    if active_tab == "Treatment Procedures":
         show_treatments(database, doctor_email, doctor_settings)
-
-    with tab2:
+    elif active_tab == "Dental Chart":
         show_chart(database, doctor_email, doctor_settings)
-
-    with tab3:
+    elif active_tab == "Currency Settings":
         show_currency(database, doctor_email, doctor_settings)
-
-    with tab4:
+    else:
         show_profile(database, doctor_email)
 
 
-def load_settings(database, doctor_email):
-    """Load doctor settings from Firestore or create default settings if none exist."""
-    try:
-        doctor_ref = database.collection("doctors").document(doctor_email)
-        settings_doc = doctor_ref.collection("settings").document("config").get()
-
-        # Check if settings document exists
-        if settings_doc.exists:
-            settings = settings_doc.to_dict()
-        else:
-            # Create default settings if none exist
-            settings = {
-                "treatment_procedures": ["Cleaning"],
-                "price_estimates": {"Cleaning": 100},
-                "health_conditions": ["Healthy"],
-                "condition_colors": {"Healthy": "#4CAF50"},
-                "currency": "SAR"
+@st.cache_data(ttl=300, show_spinner=False)
+def load_settings(_database, doctor_email):
+    """Load doctor settings from Firestore or create default settings if none exist.
+
+    Cached per doctor so widget interactions don't trigger a Firestore read on
+    every rerun. The cache is cleared by save_settings after each write.
+    Firestore errors propagate to the caller: st.cache_data does not cache a
+    raising call, so a transient failure only affects the current rerun.
+    """
+    doctor_ref = _database.collection("doctors").document(doctor_email)
+    config_ref = doctor_ref.collection("settings").document("config")
+
+    # Fetch the settings and the doctor profile in one batched RPC
+    # instead of paying a separate round-trip per document
+    settings_doc = None
+    for snapshot in _database.get_all([config_ref, doctor_ref]):
+        if snapshot.reference == config_ref:
+            settings_doc = snapshot
+        elif snapshot.exists:
+            st.session_state["doctor_profile"] = snapshot.to_dict()
+
+    # Check if settings document exists
+    if settings_doc is not None and settings_doc.exists:
+        settings = settings_doc.to_dict()
+        # Drop price entries orphaned by renames made before the form
+        # editor kept names and prices paired, so stale keys stop
+        # accumulating in the document
+        procedures = settings.get("treatment_procedures")
+        prices = settings.get("price_estimates")
+        if procedures is not None and prices:
+            live_names = set(procedures)
+            settings["price_estimates"] = {
+                name: price for name, price in prices.items() if name in live_names
             }
-            save_settings(database, doctor_email, settings)
+    else:
+        # Create default settings if none exist
+        settings = copy.deepcopy(DEFAULT_SETTINGS)
+        save_settings(_database, doctor_email, settings)
 
-        return settings
-    except Exception as e:
-        st.error(f"Settings load failed: {e}")
+    # Remember what the stored document looks like so idempotent saves
+    # can be skipped without a round-trip
+    st.session_state["_settings_hash"] = _settings_hash(settings)
+    return settings
 
 
-def save_settings(database, doctor_email, settings):
-    """Save updated settings to Firestore database."""
+def _settings_hash(settings):
+    """Cheap content hash of a settings dict, used to detect no-op saves."""
+    return hash(json.dumps(settings, sort_keys=True, default=str))
+
+
+def save_settings(database, doctor_email, settings, fields=None):
+    """Save updated settings to Firestore database.
+
+    When the caller knows which top-level fields changed, passing them via
+    `fields` issues a partial update() instead of rewriting the whole document.
+    Saves that match what was last loaded are skipped entirely.
+    """
+    new_hash = _settings_hash(settings)
+    if new_hash == st.session_state.get("_settings_hash"):
+        return
+
     try:
-        doctor_ref = database.collection("doctors").document(doctor_email)
-        doctor_ref.collection("settings").document("config").set(settings)
+        config_ref = database.collection("doctors").document(doctor_email).collection("settings").document("config")
+        if fields:
+            config_ref.update({field: settings[field] for field in fields})
+        else:
+            config_ref.set(settings)
+        # Invalidate the cached settings so the next load picks up this write
+        load_settings.clear()
+        st.session_state["_settings_hash"] = new_hash
     except Exception as e:
         st.error(f"Settings save failed: {e}")
 
 
+@st.fragment
 def show_treatments(database, doctor_email, doctor_settings):
     """Display and manage treatment procedures and price settings."""
     st.header("Treatment Procedures Configuration")
@@ -84,94 +171,126 @@ def show_treatments(database, doctor_email, doctor_settings):
     procedures = doctor_settings.get("treatment_procedures", [])
     prices = doctor_settings.get("price_estimates", {})
 
-    # Display existing procedures with their prices
+    # Display existing procedures with their prices inside a form so edits
+    # only trigger a rerun (and a save) on submit, not on every keystroke
     if procedures:
-        for i, procedure in enumerate(procedures):
-            cols = st.columns([4, 3, 1])
+        with st.form("treatments_form"):
+            col_headers = st.columns([4, 3, 1])
+            with col_headers[0]:
+                st.write("**Procedure**")
+            with col_headers[1]:
+                st.write(f"**Price ({doctor_settings.get('currency', 'SAR')})**")
+            with col_headers[2]:
+                st.write("**Action**")
+
+            for i, procedure in enumerate(procedures):
+                cols = st.columns([4, 3, 1])
+                with cols[0]:
+                    st.text_input(
+                        "Procedure",
+                        value=procedure,
+                        key=f"procedure_{i}",
+                        label_visibility="collapsed"
+                    )
+
+                with cols[1]:
+                    st.number_input(
+                        "Price",
+                        min_value=0.0,
+                        value=float(prices.get(procedure, 0)),
+                        step=10.0,
+                        format="%.2f",
+                        key=f"price_{i}",
+                        label_visibility="collapsed"
+                    )
+
+                with cols[2]:
+                    st.selectbox(
+                        "Action",
+                        ["✓", "✗"],
+                        key=f"remove_procedure_{i}",
+                        label_visibility="collapsed"
+                    )
+
+            if st.form_submit_button("✔️ Save Changes", use_container_width=True):
+                # Rebuild the procedure list and prices from the form rows so
+                # renames, price edits and removals land in one Firestore write
+                updated_procedures = []
+                updated_prices = {}
+                for i, procedure in enumerate(procedures):
+                    if st.session_state[f"remove_procedure_{i}"] == "✗":
+                        continue
+                    new_name = st.session_state[f"procedure_{i}"].title()
+                    if new_name:
+                        updated_procedures.append(new_name)
+                        updated_prices[new_name] = st.session_state[f"price_{i}"]
+
+                # Skip the Firestore write when the form was submitted unchanged
+                if updated_procedures == procedures and updated_prices == prices:
+                    st.info("No changes to save")
+                else:
+                    doctor_settings["treatment_procedures"] = updated_procedures
+                    doctor_settings["price_estimates"] = updated_prices
+                    save_settings(database, doctor_email, doctor_settings,
+                                  fields=["treatment_procedures", "price_estimates"])
+                    # The row widgets are keyed by list index, so drop their
+                    # state before rerunning: a row shifting into a removed
+                    # row's index would otherwise inherit its "✗" selection
+                    for i in range(len(procedures)):
+                        for prefix in ("procedure_", "price_", "remove_procedure_"):
+                            st.session_state.pop(f"{prefix}{i}", None)
+                    st.success("Treatment procedures updated successfully")
+                    st.rerun(scope="fragment")
+    else:
+        st.caption("No procedures added yet.")
+
+    # Add new procedure section
+    with st.expander("Add New Procedure", expanded=True):
+        st.subheader("Create a New Procedure")
+
+        with st.form("add_procedure_form"):
+            cols = st.columns([1, 1])
             with cols[0]:
-                st.text(f"Procedure {i+1}")
-                new_name = st.text_input(
-                    "",
-                    value=procedure, 
-                    key=f"procedure_{i}",
+                st.text("Procedure Name")
+                new_procedure = st.text_input(
+                    "Procedure Name",
+                    key="new_procedure",
                     label_visibility="collapsed"
-                ).title()
-                procedures[i] = new_name
+                )
 
             with cols[1]:
                 st.text(f"Price ({doctor_settings.get('currency', 'SAR')})")
-                price = prices.get(procedure, 0)
                 new_price = st.number_input(
-                    "",
+                    "Price",
                     min_value=0.0,
-                    value=float(price),
+                    value=0.0,
                     step=10.0,
                     format="%.2f",
-                    key=f"price_{procedure}",
+                    key="new_procedure_price",
                     label_visibility="collapsed"
                 )
-                if new_price != price:
-                    prices[procedure] = new_price
-
-            with cols[2]:
-                st.write("")
-                st.write("")
-                if st.button("❌", key=f"delete_procedure_{i}"):
-                    procedures.pop(i)
-                    if procedure in prices:
-                        prices.pop(procedure)
-
-                    # Update settings and save to database
-                    doctor_settings["treatment_procedures"] = procedures
-                    doctor_settings["price_estimates"] = prices
-                    save_settings(database, doctor_email, doctor_settings)
-                    st.success("Treatment procedure removed successfully")
-                    st.rerun()
-    else:
-        st.caption("No procedures added yet.")
-
-    # Add new procedure section
-    with st.expander("Add New Procedure", expanded=True):
-        st.subheader("Create a New Procedure")
-
-        cols = st.columns([1, 1])
-        with cols[0]:
-            st.text("Procedure Name")
-            new_procedure = st.text_input(
-                "",
-                key="new_procedure",
-                label_visibility="collapsed"
-            ).title()
 
-        with cols[1]:
-            st.text(f"Price ({doctor_settings.get('currency', 'SAR')})")
-            new_price = st.number_input(
-                "",
-                min_value=0.0,
-                value=0.0,
-                step=10.0,
-                format="%.2f",
-                key="new_procedure_price",
-                label_visibility="collapsed"
-            )
-
-        if st.button("✔️ Save Procedure", use_container_width=True):
-            if new_procedure:
-                # Check if procedure already exists to avoid duplicates
-                if new_procedure not in procedures:
-                    procedures.append(new_procedure)
-                    prices[new_procedure] = new_price
-                    doctor_settings["treatment_procedures"] = procedures
-                    doctor_settings["price_estimates"] = prices
-                    save_settings(database, doctor_email, doctor_settings)
-                    st.success(f"New procedure '{new_procedure}' has been successfully added")
-                    st.rerun()
+            if st.form_submit_button("✔️ Save Procedure", use_container_width=True):
+                # Normalize only when actually saving, not on every rerun
+                new_procedure = new_procedure.title()
+                if new_procedure:
+                    # Check if procedure already exists to avoid duplicates
+                    if new_procedure not in procedures:
+                        procedures.append(new_procedure)
+                        prices[new_procedure] = new_price
+                        doctor_settings["treatment_procedures"] = procedures
+                        doctor_settings["price_estimates"] = prices
+                        save_settings(database, doctor_email, doctor_settings,
+                                      fields=["treatment_procedures", "price_estimates"])
+                        st.success(f"New procedure '{new_procedure}' has been successfully added")
+                        st.rerun(scope="fragment")
+                    else:
+                        st.error("This procedure already exists in your list")
                 else:
-                    st.error("This procedure already exists in your list")
-            else:
-                st.error("Please enter a procedure name")
+                    st.error("Please enter a procedure name")
 
 
+@st.fragment
 def show_chart(database, doctor_email, doctor_settings):
     """Display health conditions and dental chart settings."""
     st.header("Dental Chart Configuration")
@@ -184,41 +303,53 @@ def show_chart(database, doctor_email, doctor_settings):
     st.subheader("Tooth Health Conditions")
     with st.container(border=True):
         if health_conditions:
-            for i, condition in enumerate(health_conditions):
-                cols = st.columns([5, 2, 1])
-
-                with cols[0]:
-                    new_condition = st.text_input(
-                        f"Condition {i+1}",
-                        value=condition,
-                        key=f"condition_{i}"
-                    ).strip()
-                    health_conditions[i] = new_condition
-
-                with cols[1]:
-                    current_color = condition_colors.get(condition, "#FFFFFF")
-                    new_color = st.color_picker(
-                        "Color",
-                        value=current_color,
-                        key=f"color_{i}"
-                    )
-                    condition_colors[condition] = new_color
+            # A single data editor replaces the text input, color picker and
+            # delete button per condition, so the tab renders one widget
+            # instead of three per row
+            conditions_df = pd.DataFrame({
+                "Condition": health_conditions,
+                "Color": [condition_colors.get(condition, "#FFFFFF") for condition in health_conditions]
+            })
+            edited_df = st.data_editor(
+                conditions_df,
+                num_rows="dynamic",
+                use_container_width=True,
+                key="conditions_editor",
+                column_config={
+                    "Condition": st.column_config.TextColumn("Condition", required=True),
+                    "Color": st.column_config.TextColumn("Color", help="Hex color, e.g. #4CAF50")
+                }
+            )
 
-                with cols[2]:
-                    if i > 0:  # Only show delete button for non-first conditions
-                        # Add vertical spacing to align with inputs
-                        st.write("")
-                        st.write("")
-                        if st.button("❌", key=f"delete_condition_{i}"):
-                            health_conditions.pop(i)
-                            if condition in condition_colors:
-                                condition_colors.pop(condition)
-
-                            doctor_settings["health_conditions"] = health_conditions
-                            doctor_settings["condition_colors"] = condition_colors
-                            save_settings(database, doctor_email, doctor_settings)
-                            st.success("Health condition removed successfully")
-                            st.rerun()
+            if st.button("✔️ Save Conditions", use_container_width=True):
+                updated_conditions = []
+                updated_colors = {}
+                for _, row in edited_df.iterrows():
+                    # Freshly added rows come back with None/NaN cells; skip
+                    # them instead of saving a literal "None" condition
+                    if pd.isna(row["Condition"]):
+                        continue
+                    condition = str(row["Condition"]).strip()
+                    if condition and condition not in updated_colors:
+                        updated_conditions.append(condition)
+                        color = row["Color"]
+                        updated_colors[condition] = "#808080" if pd.isna(color) or not color else color
+
+                if not updated_conditions:
+                    st.error("At least one health condition is required")
+                elif "Healthy" not in updated_conditions:
+                    # "Healthy" is the default condition the chart and
+                    # treatment pages fall back to everywhere, so it cannot
+                    # be deleted — the old per-row UI hid its delete button
+                    st.error('The "Healthy" condition cannot be removed')
+                else:
+                    doctor_settings["health_conditions"] = updated_conditions
+                    doctor_settings["condition_colors"] = updated_colors
+                    # No rerun needed: the editor already displays the rows
+                    # that were just saved
+                    save_settings(database, doctor_email, doctor_settings,
+                                  fields=["health_conditions", "condition_colors"])
+                    st.success("Health conditions updated successfully")
         else:
             st.caption("No health conditions defined. Add at least one condition.")
 
@@ -229,7 +360,7 @@ def show_chart(database, doctor_email, doctor_settings):
             new_condition = st.text_input(
                 "New Health Condition",
                 key="new_health_condition"
-            ).strip()
+            )
 
         with cols[1]:
             new_color = st.color_picker(
@@ -239,72 +370,55 @@ def show_chart(database, doctor_email, doctor_settings):
             )
 
         if st.button("✔️ Add Health Condition", use_container_width=True):
+            # Normalize only when actually saving, not on every rerun
+            new_condition = new_condition.strip()
             if new_condition:
-                if new_condition.lower() not in [c.lower() for c in health_conditions]:
+                # Set membership instead of a linear scan over a rebuilt list
+                existing_conditions = {c.lower() for c in health_conditions}
+                if new_condition.lower() not in existing_conditions:
                     health_conditions.append(new_condition)
                     condition_colors[new_condition] = new_color
 
                     doctor_settings["health_conditions"] = health_conditions
                     doctor_settings["condition_colors"] = condition_colors
-                    save_settings(database, doctor_email, doctor_settings)
+                    save_settings(database, doctor_email, doctor_settings,
+                                  fields=["health_conditions", "condition_colors"])
                     st.success(f"New health condition '{new_condition}' added successfully")
-                    st.rerun()
+                    st.rerun(scope="fragment")
                 else:
                     st.error("This health condition already exists")
             else:
                 st.error("Please enter a health condition name")
 
     with st.expander("Dental Notation System", expanded=True):
-        st.subheader("FDI World Dental Federation Notation (ISO 3950)")
-        st.info("""
-        This application uses the FDI (Fédération Dentaire Internationale) notation system, also known as ISO 3950.
-
-        This two-digit system divides the mouth into four quadrants:
-        - Upper Right (1): teeth 18-11
-        - Upper Left (2): teeth 21-28
-        - Lower Right (4): teeth 48-41
-        - Lower Left (3): teeth 31-38
-
-        The first digit indicates the quadrant, while the second digit indicates the tooth position from the midline.
-        """)
-
-        # Visual representation of the dental quadrants
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown("**Upper Jaw**")
-            st.markdown("18 17 16 15 14 13 12 11 | 21 22 23 24 25 26 27 28")
-        with col2:
-            st.markdown("**Lower Jaw**")
-            st.markdown("48 47 46 45 44 43 42 41 | 31 32 33 34 35 36 37 38")
+        st.markdown(FDI_NOTATION_MD)
 
 
+@st.fragment
 def show_currency(database, doctor_email, doctor_settings):
     """Display and manage currency settings."""
     st.header("Currency Settings")
     st.info("Set your preferred currency for price estimates")
 
     current_currency = doctor_settings.get("currency", "SAR")
-    currency_options = {
-        "SAR": "Saudi Riyal (SAR)",
-        "INR": "Indian Rupee (₹)"
-    }
 
     # Display currency selection
     with st.container(border=True):
         selected_currency = st.selectbox(
             "Select Currency",
-            options=list(currency_options.keys()),
-            format_func=lambda x: currency_options[x],
-            index=list(currency_options.keys()).index(current_currency) if current_currency in currency_options else 0
+            options=CURRENCY_KEYS,
+            format_func=lambda x: CURRENCY_OPTIONS[x],
+            index=CURRENCY_KEYS.index(current_currency) if current_currency in CURRENCY_OPTIONS else 0
         )
 
         # Save button for currency changes
         if st.button("✔️ Save Currency Preference", use_container_width=True):
             if selected_currency != current_currency:
                 doctor_settings["currency"] = selected_currency
-                save_settings(database, doctor_email, doctor_settings)
-                st.success(f"Currency updated to {currency_options[selected_currency]}")
-                st.rerun()
+                # No rerun needed: the selectbox already shows the chosen
+                # currency and doctor_settings was updated in place
+                save_settings(database, doctor_email, doctor_settings, fields=["currency"])
+                st.success(f"Currency updated to {CURRENCY_OPTIONS[selected_currency]}")
 
 
 def show_profile(database, doctor_email):
@@ -313,12 +427,18 @@ def show_profile(database, doctor_email):
     st.info("Update your profile information")
 
     try:
-        # Get current doctor information
         doctor_ref = database.collection("doctors").document(doctor_email)
-        doctor_doc = doctor_ref.get()
 
-        if doctor_doc.exists:
-            doctor_data = doctor_doc.to_dict()
+        # The profile document rarely changes, so reuse the copy stashed in
+        # session state (seeded by load_settings) instead of re-reading it
+        # from Firestore on every rerun
+        if "doctor_profile" not in st.session_state:
+            doctor_doc = doctor_ref.get()
+            if doctor_doc.exists:
+                st.session_state["doctor_profile"] = doctor_doc.to_dict()
+
+        doctor_data = st.session_state.get("doctor_profile")
+        if doctor_data is not None:
             current_name = doctor_data.get("name", "")
             current_hospital = doctor_data.get("hospital_name", "")
             current_address = doctor_data.get("hospital_address", "")
@@ -341,7 +461,13 @@ def show_profile(database, doctor_email):
                             "hospital_address": new_address
                         })
 
-                        # Update session state
+                        # Update the cached profile and session state locally
+                        # rather than refetching the document
+                        doctor_data.update({
+                            "name": new_name,
+                            "hospital_name": new_hospital,
+                            "hospital_address": new_address
+                        })
                         st.session_state["doctor_name"] = new_name
                         st.session_state["hospital_name"] = new_hospital
                         st.session_state["hospital_address"] = new_address
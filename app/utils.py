@@ -1,51 +1,210 @@
 import os
-import cloudinary
-import requests
-import tempfile
+import json
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from fpdf import FPDF
+from functools import lru_cache
+from io import BytesIO
+from firebase_admin import firestore
 from dotenv import load_dotenv
 
-load_dotenv()
+# cloudinary, fpdf, PIL and requests are imported lazily inside the
+# functions that need them: they only matter for report generation, and
+# deferring them keeps Streamlit cold start (login page) snappy.
+
+# Characters replaced when turning a patient name into a filename: spaces
+# plus everything the common filesystems reject (and path separators)
+_FILENAME_TABLE = str.maketrans({c: "_" for c in ' /\\:*?"<>|'})
+
+# Currency code to display symbol, built once instead of per call
+_CURRENCY_SYMBOLS = {
+    "SAR": "SAR",
+    "INR": "₹"
+}
+
+# Colored tooth box markup for render_chart, defined once at module scope so
+# each rerun only fills in the color and tooth number
+_TOOTH_TEMPLATE = """
+<div style="
+    flex: 1;
+    background-color: {color};
+    color: white;
+    text-align: center;
+    padding: 10px 0;
+    border-radius: 5px;
+    font-weight: bold;
+    margin-bottom: 5px;
+">
+    {tooth}
+</div>
+"""
+
+
+@st.cache_resource
+def get_db():
+    """Return a shared Firestore client so every page reuses one gRPC channel."""
+    return firestore.client()
+
+
+@st.cache_data
+def load_dental_data():
+    """Load the bundled dental chart data (teeth maps and rows) once per process."""
+    with open("app/data.json", "r") as file:
+        return json.load(file)
+
+@lru_cache(maxsize=4096)
+def _format_date_str(date_str):
+    """Parse and format a date string, memoized since reruns repeat the same dates."""
+    try:
+        date_obj = datetime.strptime(date_str, "%Y-%m-%d")
+    except (ValueError, TypeError):
+        return date_str  # Return original if parsing fails
+
+    return date_obj.strftime("%B %d, %Y")
+
 
 def format_date(date_str):
     """Convert date string to formatted date (e.g., '2021-12-31' -> 'December 31, 2021')"""
     if isinstance(date_str, datetime):
-        date_obj = date_str
-    else:
-        try:
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-        except (ValueError, TypeError):
-            return date_str  # Return original if parsing fails
+        return date_str.strftime("%B %d, %Y")
+
+    return _format_date_str(date_str)
+
+
+# Static markup for show_footer/custom_css, allocated once at module scope
+# instead of rebuilding the multi-line literals on every rerun
+_FOOTER_HTML = """
+<footer style="text-align: center">
+    🔓 FOSS (Free and Open Source Software)
+    <br>
+    <a href="https://github.com/dent-noor/DentistFriend">GitHub</a> •
+    <a href="https://github.com/dent-noor/DentistFriend/blob/main/LICENSE">License</a> •
+    <a href="https://github.com/dent-noor/DentistFriend/blob/main/README.md">Documentation</a>
+</footer>
+"""
+
+_CUSTOM_CSS = """
+<style>
+    .stButton > button {
+        padding: 12px 8px;
+        font-size: 16px;
+        font-weight: 500;
+        border-radius: 8px;
+        transition: all 0.3s ease;
+        box-shadow: 0 2px 5px rgba(0, 0, 0, 0.1);
+    }
 
-    return date_obj.strftime("%B %d, %Y")
+    .stButton > button:hover {
+        transform: translateY(-2px);
+        box-shadow: 0 4px 8px rgba(0, 0, 0, 0.15);
+    }
+
+    .stButton > button svg {
+        height: 20px;
+        width: 20px;
+        margin-right: 6px;
+    }
+
+    .stAlert {
+        border-radius: 8px;
+    }
+</style>
+"""
 
 
 def show_footer():
     """Display the footer with links to GitHub, License, and Documentation"""
     st.divider()
-    st.markdown(
-        """
-        <footer style="text-align: center">
-            🔓 FOSS (Free and Open Source Software)
-            <br>
-            <a href="https://github.com/dent-noor/DentistFriend">GitHub</a> •
-            <a href="https://github.com/dent-noor/DentistFriend/blob/main/LICENSE">License</a> •
-            <a href="https://github.com/dent-noor/DentistFriend/blob/main/README.md">Documentation</a>
-        </footer>
-        """,
-        unsafe_allow_html=True
-    )
+    st.markdown(_FOOTER_HTML, unsafe_allow_html=True)
+
+
+# Per-doctor session keys dropped on logout; purely visual widget state
+# (active tab, expander toggles, ...) is left alone
+_DOCTOR_SESSION_KEYS = (
+    "logged_in", "doctor_name", "doctor_email", "hospital_name",
+    "hospital_address", "doctor_profile", "_settings_hash",
+    "treatment_record", "patient_status", "patient_selected",
+    "tooth_selected", "search_results", "inventory_data",
+    "alert_email", "enable_email_alerts", "email_alert_sent"
+)
+
+
+def clear_doctor_session():
+    """Drop every doctor-specific session key on logout.
+
+    Covers the fixed keys above plus the dynamic per-tooth chart keys
+    (tooth_*/tooth_condition_*), which would otherwise leak one doctor's
+    chart edits into the next doctor's patients on a shared machine.
+    """
+    for key in _DOCTOR_SESSION_KEYS:
+        st.session_state.pop(key, None)
+    for key in [k for k in st.session_state if isinstance(k, str) and k.startswith("tooth_")]:
+        del st.session_state[key]
+
+
+@lru_cache(maxsize=None)
+def _http():
+    """Shared HTTP session so X-ray downloads reuse pooled TLS connections.
+
+    Created on first use rather than at import time.
+    """
+    import requests
+
+    session = requests.Session()
+    session.headers.update({"User-Agent": "DentistFriend/1.0"})
+    return session
+
+
+def _downscale_image(image_blob, max_side=1000):
+    """Shrink an image blob so the PDF doesn't embed megapixels that render at 80mm wide.
+
+    Returns the original bytes when the image is already small enough or can't
+    be decoded.
+    """
+    from PIL import Image
+
+    try:
+        image = Image.open(BytesIO(image_blob))
+        if max(image.size) <= max_side:
+            return image_blob
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        resized = BytesIO()
+        image.save(resized, "JPEG", quality=85, optimize=True)
+        return resized.getvalue()
+    except Exception:
+        return image_blob
+
+
+def _section_title(pdf, text, spacing=5):
+    """Write a bold section heading with an underline rule"""
+    pdf.set_font("Arial", "B", 12)
+    pdf.set_draw_color(100, 100, 100)
+    # Bottom border on the title cell doubles as the underline, saving a
+    # separate pdf.line operator per heading
+    pdf.cell(0, 8, text, "B", 1, "L")
+    pdf.ln(spacing)
 
 
 def generate_pdf(doctor_name, patient_name, treatment_plan, currency_symbol="SAR", discount=0, vat=0, total_cost=0, xray_images=None):
     """Generate a PDF document with treatment plan details and X-ray images"""
+    from fpdf import FPDF
+
+    # Coerce the monetary inputs once at the boundary so the rest of the
+    # function can treat them as plain floats
+    discount = float(discount or 0)
+    vat = float(vat or 0)
+    total_cost = float(total_cost or 0)
 
     # Initialize PDF with margins
     pdf = FPDF(orientation="P", unit="mm", format="A4")
     pdf.set_auto_page_break(auto=True, margin=15)
     pdf.set_margins(left=15, top=15, right=15)
+    # Embed JPEGs as-is (DCTDecode passthrough) rather than letting fpdf2
+    # decode and Flate-recompress anything it deems oversized; images are
+    # already downscaled before they reach pdf.image
+    pdf.oversized_images = "WARN"
 
     if currency_symbol == "₹":
         display_currency = "INR"
@@ -75,39 +234,36 @@ def generate_pdf(doctor_name, patient_name, treatment_plan, currency_symbol="SAR
     pdf.set_font("Arial", "B", 14)
     pdf.cell(0, 10, "Dental Treatment Plan", 0, 1, "C")
 
+    # Capture the timestamp once so the date, report ID and footer agree
+    now = datetime.now()
+
     # Date on top right
     pdf.set_font("Arial", "", 10)
-    current_date = datetime.now().strftime("%B %d, %Y")
+    current_date = now.strftime("%B %d, %Y")
     pdf.cell(0, 6, f"Date: {current_date}", 0, 1, "R")
 
     # Patient information section
     pdf.ln(5)
-    pdf.set_font("Arial", "B", 12)
-    pdf.cell(0, 8, "Patient Information", 0, 1, "L")
-    pdf.set_draw_color(100, 100, 100)
-    pdf.line(15, pdf.get_y(), 195, pdf.get_y())
-    pdf.ln(5)
+    _section_title(pdf, "Patient Information")
 
     # Patient and doctor details
     pdf.set_font("Arial", "", 11)
     pdf.cell(0, 7, f"Dentist: {doctor_name}".title(), 0, 1)
     pdf.cell(0, 7, f"Patient Name: {patient_name}".title(), 0, 1)
-    report_id = datetime.now().strftime('%Y%m%d%H%M%S')
+    report_id = now.strftime('%Y%m%d%H%M%S')
     pdf.cell(0, 7, f"Report ID: {report_id}", 0, 1)
     pdf.ln(5)
 
     # Treatment plan details section
-    pdf.set_font("Arial", "B", 12)
-    pdf.cell(0, 8, "Treatment Plan Details", 0, 1, "L")
-    pdf.set_draw_color(100, 100, 100)
-    pdf.line(15, pdf.get_y(), 195, pdf.get_y())
-    pdf.ln(5)
+    _section_title(pdf, "Treatment Plan Details")
 
     if not treatment_plan:
         pdf.set_font("Arial", "", 11)
         pdf.cell(0, 10, "No treatment procedures have been defined yet.", 0, 1)
     else:
-        # Create treatment table with headers
+        # fpdf2's table API batches measurement, wrapping and operator
+        # emission in one pass instead of several Python-level cell calls
+        # (and manual set_xy/rect/line math) per row
         pdf.set_font("Arial", "B", 10)
         pdf.set_fill_color(240, 240, 240)  # Lighter gray for header
 
@@ -123,8 +279,8 @@ def generate_pdf(doctor_name, patient_name, treatment_plan, currency_symbol="SAR
 
         # Calculate remaining width for Condition and Procedure columns
         remaining_width = available_width - (tooth_width + cost_width)
-        condition_width = int(remaining_width * 0.4)  # 40% of remaining width
-        procedure_width = int(remaining_width * 0.6)  # 60% of remaining width
+        condition_width = remaining_width * 4 // 10  # 40% of remaining width
+        procedure_width = remaining_width * 6 // 10  # 60% of remaining width
 
         col_widths = [tooth_width, condition_width, procedure_width, cost_width]
 
@@ -137,122 +293,41 @@ def generate_pdf(doctor_name, patient_name, treatment_plan, currency_symbol="SAR
                 available_columns.append(col)
                 available_widths.append(col_widths[i])
 
-        # Create table header row
-        for i, col in enumerate(available_columns):
-            pdf.cell(available_widths[i], 10, col, 1, 0, "C", True)
-        pdf.ln()
-
-        # Add treatment data rows with alternating colors
         pdf.set_font("Arial", "", 10)
-        for idx, item in enumerate(treatment_plan):
-            # Check if we need to alternate row colors
-            if idx % 2 == 1:
-                pdf.set_fill_color(245, 245, 245)
-                fill = True
-            else:
-                fill = False
-
-            # Calculate needed heights for each cell based on content
-            max_chars_per_line = {
-                "Tooth": 10,
-                "Condition": int(condition_width / 2),  # Approx 2mm per char
-                "Procedure": int(procedure_width / 2),
-                "Cost": 15
-            }
-
-            cell_heights = {}
-            cell_texts = {}
-
-            # First pass: calculate row height
+        text_align = ["RIGHT" if col == "Cost" else "LEFT" for col in available_columns]
+
+        # Pre-bind the per-column cost flag so the row loop unpacks a tuple
+        # instead of comparing strings for every cell
+        column_flags = [(col, col == "Cost") for col in available_columns]
+
+        with pdf.table(
+            col_widths=available_widths,
+            text_align=text_align,
+            first_row_as_headings=True,
+            line_height=6
+        ) as table:
+            header_row = table.row()
             for col in available_columns:
-                value = str(item.get(col, ""))
-                cell_texts[col] = value
-
-                if len(value) > max_chars_per_line.get(col, 20) and col in ["Condition", "Procedure"]:
-                    chars_per_line = max_chars_per_line.get(col, 20)
-                    # Estimate number of lines needed
-                    num_lines = len(value) / chars_per_line
-                    cell_heights[col] = max(8, int(num_lines * 6))  # 6mm per line, minimum 8mm
-                else:
-                    cell_heights[col] = 8  # Default height
-
-            # Use the maximum height for the entire row
-            row_height = max(cell_heights.values()) if cell_heights else 8
-
-            # Store starting position
-            start_y = pdf.get_y()
-            start_x = pdf.get_x()
-
-            # Draw all cell backgrounds and borders first
-            current_x = start_x
-            for i, col in enumerate(available_columns):
-                width = available_widths[i]
-                # Draw cell background and border only
-                pdf.set_fill_color(245, 245, 245) if fill else pdf.set_fill_color(255, 255, 255)
-                pdf.rect(current_x, start_y, width, row_height, style="DF")
-                current_x += width
-
-            # Second pass: add content to cells
-            current_x = start_x
-            for i, col in enumerate(available_columns):
-                width = available_widths[i]
-                value = cell_texts[col]
-
-                # Format currency for cost column
-                if col == "Cost" and value:
-                    try:
-                        value = f"{display_currency} {float(value):.2f}"
-                    except ValueError:
-                        pass
-
-                # Set alignment based on column type
-                align = "R" if col == "Cost" else "L"
-
-                # Handle text differently based on length and column
-                if len(value) > max_chars_per_line.get(col, 20) and col in ["Condition", "Procedure"]:
-                    pdf.set_xy(current_x + 1, start_y + 1)  # Add 1mm padding
-
-                    # Use multi_cell with border=0 to avoid extra lines
-                    pdf.multi_cell(
-                        width - 2,  # Width minus padding
-                        5,  # Fixed line height
-                        value,
-                        0,  # No border - important!
-                        align,
-                        0   # No fill - already done
-                    )
-                else:
-                    # For short text, center vertically
-                    text_y = start_y + (row_height - 4) / 2
-                    pdf.set_xy(current_x + 1, text_y)
-                    pdf.cell(width - 2, 4, value, 0, 0, align, 0)
-
-                # Draw border lines manually to ensure clean borders
-                pdf.set_draw_color(0, 0, 0)
-                pdf.line(current_x, start_y, current_x, start_y + row_height)  # Left
-                pdf.line(current_x + width, start_y, current_x + width, start_y + row_height)  # Right
-                pdf.line(current_x, start_y, current_x + width, start_y)  # Top
-                pdf.line(current_x, start_y + row_height, current_x + width, start_y + row_height)  # Bottom
-
-                current_x += width
-
-            # Move cursor to next row
-            pdf.set_y(start_y + row_height)
+                header_row.cell(col)
+
+            for item in treatment_plan:
+                row = table.row()
+                for col, is_cost in column_flags:
+                    value = str(item.get(col, ""))
+                    # Format currency for cost column
+                    if is_cost and value:
+                        try:
+                            value = f"{display_currency} {float(value):.2f}"
+                        except ValueError:
+                            pass
+                    row.cell(value)
 
     # Add cost summary section with proper spacing
     pdf.ln(10)
-    pdf.set_font("Arial", "B", 12)
-    pdf.cell(0, 8, "Cost Summary", 0, 1, "L")
-    pdf.set_draw_color(100, 100, 100)
-    pdf.line(15, pdf.get_y(), 195, pdf.get_y())
-    pdf.ln(5)
+    _section_title(pdf, "Cost Summary")
 
     # Calculate final cost
-    final_cost = total_cost
-    if isinstance(discount, (int, float)):
-        final_cost -= discount
-    if isinstance(vat, (int, float)):
-        final_cost += vat
+    final_cost = total_cost - discount + vat
 
     # Define column layout for cost table
     col1_width = 120
@@ -264,23 +339,23 @@ def generate_pdf(doctor_name, patient_name, treatment_plan, currency_symbol="SAR
 
     # Total row
     pdf.cell(col1_width, 8, "Total Treatment Cost", 1, 0, "L", True)
-    pdf.cell(col2_width, 8, f"{display_currency} {float(total_cost):.2f}", 1, 1, "R", True)
+    pdf.cell(col2_width, 8, f"{display_currency} {total_cost:.2f}", 1, 1, "R", True)
 
     # Discount row (if applicable)
     if discount > 0:
         pdf.cell(col1_width, 8, "Discount", 1, 0, "L")
-        pdf.cell(col2_width, 8, f"-{display_currency} {float(discount):.2f}", 1, 1, "R")
+        pdf.cell(col2_width, 8, f"-{display_currency} {discount:.2f}", 1, 1, "R")
 
     # VAT row (if applicable)
     if vat > 0:
         pdf.cell(col1_width, 8, "VAT (15%)", 1, 0, "L")
-        pdf.cell(col2_width, 8, f"+{display_currency} {float(vat):.2f}", 1, 1, "R")
+        pdf.cell(col2_width, 8, f"+{display_currency} {vat:.2f}", 1, 1, "R")
 
     # Final total row with highlighting
     pdf.set_font("Arial", "B", 10)
     pdf.set_fill_color(230, 230, 230)  # Darker highlight for total
     pdf.cell(col1_width, 8, "Final Total", 1, 0, "L", True)
-    pdf.cell(col2_width, 8, f"{display_currency} {float(final_cost):.2f}", 1, 1, "R", True)
+    pdf.cell(col2_width, 8, f"{display_currency} {final_cost:.2f}", 1, 1, "R", True)
 
     if xray_images and len(xray_images) > 0:
         # Add a new page for X-rays if there's not enough space
@@ -289,11 +364,7 @@ def generate_pdf(doctor_name, patient_name, treatment_plan, currency_symbol="SAR
         else:
             pdf.ln(15)  # Add spacing after cost table
 
-        pdf.set_font("Arial", "B", 12)
-        pdf.cell(0, 8, "Dental X-Ray Images", 0, 1, "L")
-        pdf.set_draw_color(100, 100, 100)
-        pdf.line(15, pdf.get_y(), 195, pdf.get_y())
-        pdf.ln(10)
+        _section_title(pdf, "Dental X-Ray Images", spacing=10)
 
         # Determine grid layout based on number of images
         images_per_row = 2
@@ -303,6 +374,26 @@ def generate_pdf(doctor_name, patient_name, treatment_plan, currency_symbol="SAR
         current_x = 15
         current_y = pdf.get_y()
 
+        # Download all X-ray images up front in parallel: the fetches are
+        # network-bound, so overlapping them costs roughly one round-trip
+        # instead of one per image
+        def fetch_image(url):
+            # Ask Cloudinary's CDN for a pre-sized optimized JPEG so the
+            # resize happens server-side and far fewer bytes travel; fall
+            # back to the original asset if the transformed URL fails
+            transformed = url.replace("/upload/", "/upload/w_1000,q_auto,f_jpg/", 1)
+            for candidate in dict.fromkeys((transformed, url)):
+                try:
+                    response = _http().get(candidate, timeout=10)
+                    response.raise_for_status()
+                    return _downscale_image(response.content)
+                except Exception:
+                    continue
+            return None
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            image_blobs = list(executor.map(fetch_image, [xray["url"] for xray in xray_images]))
+
         for i, xray in enumerate(xray_images):
             # Check if we need to move to next row or new page
             if i > 0 and i % images_per_row == 0:
@@ -315,18 +406,21 @@ def generate_pdf(doctor_name, patient_name, treatment_plan, currency_symbol="SAR
                     current_y = 15 + 10  # Top margin + padding
 
             try:
-                # Create a temporary file for the image
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_file:
-                    temp_img_path = temp_file.name
-
-                # Download image from Cloudinary URL
-                response = requests.get(xray["url"], stream=True)
-                if response.status_code == 200:
-                    with open(temp_img_path, 'wb') as f:
-                        f.write(response.content)
-
-                    # Add image to PDF with balanced dimensions
-                    pdf.image(temp_img_path, x=current_x, y=current_y, w=max_image_width)
+                image_blob = image_blobs[i]
+                # Release our reference once embedded so peak memory tracks
+                # the single image being placed, not the whole set twice
+                image_blobs[i] = None
+
+                # Reject pathological assets before any PDF work; anything
+                # this large survived neither the CDN resize nor the local
+                # downscale and would dominate the document
+                if image_blob is not None and len(image_blob) > 20 * 1024 * 1024:
+                    image_blob = None
+
+                if image_blob is not None:
+                    # Embed straight from memory; fpdf2 accepts file-like
+                    # objects, so no tempfile write/read/remove per image
+                    pdf.image(BytesIO(image_blob), x=current_x, y=current_y, w=max_image_width)
 
                     # Add caption under the image
                     caption_y = current_y + max_image_height - 10
@@ -334,11 +428,10 @@ def generate_pdf(doctor_name, patient_name, treatment_plan, currency_symbol="SAR
                     pdf.set_font("Arial", "", 8)
                     pdf.multi_cell(max_image_width, 5, xray.get("caption", "X-Ray Image"), 0, 'C')
 
-                    # Clean up temporary file
-                    os.remove(temp_img_path)
-
                     # Move x position for next image
                     current_x += max_image_width + 15  # Image width + padding
+                else:
+                    raise ValueError("image download failed")
             except Exception as e:
                 pdf.set_font("Arial", "", 10)
                 pdf.set_xy(current_x, current_y)
@@ -348,14 +441,13 @@ def generate_pdf(doctor_name, patient_name, treatment_plan, currency_symbol="SAR
     # Add footer with proper spacing
     pdf.ln(15)
     pdf.set_font("Arial", "I", 8)
-    generation_time = datetime.now()
     pdf.cell(0, 5, "Generated by Dental Treatment Planner", 0, 1, "C")
-    pdf.cell(0, 5, f"This report was generated on {generation_time.strftime('%B %d, %Y')} at {generation_time.strftime('%H:%M')}.", 0, 1, "C")
+    pdf.cell(0, 5, f"This report was generated on {current_date} at {now.strftime('%H:%M')}.", 0, 1, "C")
 
-    # Generate filename and output PDF
-    filename = f"{patient_name.replace(' ', '_')}_treatment_plan.pdf"
-    pdf.output(filename)
-    return filename
+    # Serialize in memory: no temp file on disk, and concurrent users can't
+    # collide on the same filename
+    filename = f"{patient_name.translate(_FILENAME_TABLE)}_treatment_plan.pdf"
+    return filename, bytes(pdf.output())
 
 
 def render_chart(dental_data, dental_chart=None, doctor_settings=None):
@@ -389,67 +481,76 @@ def render_chart(dental_data, dental_chart=None, doctor_settings=None):
 
     st.header("Dental Chart Assessment")
     with st.container(border=True):
-        # Process each row of teeth in the dental chart
+        # Render each jaw line as a single flexbox markdown block instead of
+        # len(row) columns each holding a markdown and a selectbox — one
+        # element per row to diff rather than 30+ widgets per rerun
+        all_teeth = []
         for teeth_row in teeth_rows:
-            # Create appropriate number of columns based on row length
-            cols = st.columns(len(teeth_row))
-
-            for i, tooth_number in enumerate(teeth_row):
-                with cols[i]:
-                    # Get current condition from the session state first (for immediate updates)
-                    # or fall back to dental_chart, or default to "Healthy"
-                    current_condition = st.session_state.get(f"tooth_condition_{tooth_number}",
-                                                          dental_chart.get(tooth_number, "Healthy"))
-
-                    # Get the appropriate color for this tooth's condition
-                    tooth_color = condition_colors.get(current_condition, "#808080")  # Default to gray if not found
-
-                    # Create a visual box for the tooth with the appropriate color
-                    st.markdown(
-                        f"""
-                        <div style="
-                            background-color: {tooth_color};
-                            color: white;
-                            text-align: center;
-                            padding: 10px 0;
-                            border-radius: 5px;
-                            font-weight: bold;
-                            margin-bottom: 5px;
-                        ">
-                            {tooth_number}
-                        </div>
-                        """,
-                        unsafe_allow_html=True
-                    )
-
-                    # Dropdown selector for tooth condition
-                    default_index = 0
-                    try:
-                        default_index = health_conditions.index(current_condition)
-                    except (ValueError, IndexError):
-                        default_index = 0
-
-                    selected_condition = st.selectbox(
-                        f"Tooth {tooth_number}",
-                        health_conditions,
-                        index=default_index,
-                        key=f"tooth_{tooth_number}",
-                        label_visibility="collapsed",
-                        on_change=update_tooth,
-                        args=(tooth_number,)
-                    )
-
-                    # Store selected condition in session state for immediate visual updates
-                    st.session_state[f"tooth_condition_{tooth_number}"] = selected_condition
-
-                    # Track changes to dental chart
-                    if tooth_number not in dental_chart or dental_chart[tooth_number] != selected_condition:
-                        dental_chart[tooth_number] = selected_condition
-                        chart_changed = True
-
-                        # Auto-select unhealthy teeth for potential treatment
-                        if selected_condition != "Healthy":
-                            st.session_state.tooth_selected = tooth_number
+            tooth_boxes = []
+            for tooth_number in teeth_row:
+                all_teeth.append(tooth_number)
+
+                # Get current condition from the session state first (for immediate updates)
+                # or fall back to dental_chart, or default to "Healthy"
+                current_condition = st.session_state.get(f"tooth_condition_{tooth_number}",
+                                                      dental_chart.get(tooth_number, "Healthy"))
+
+                # Get the appropriate color for this tooth's condition
+                tooth_color = condition_colors.get(current_condition, "#808080")  # Default to gray if not found
+                tooth_boxes.append(_TOOTH_TEMPLATE.format(color=tooth_color, tooth=tooth_number))
+
+            st.markdown(
+                '<div style="display: flex; gap: 5px;">' + "".join(tooth_boxes) + "</div>",
+                unsafe_allow_html=True
+            )
+
+        # A single tooth/condition picker pair replaces the selectbox that
+        # used to sit under every tooth
+        edit_cols = st.columns(2)
+        with edit_cols[0]:
+            edit_tooth = st.selectbox("Tooth to edit", all_teeth, key="chart_tooth_edit")
+
+        with edit_cols[1]:
+            current_condition = st.session_state.get(f"tooth_condition_{edit_tooth}",
+                                                  dental_chart.get(edit_tooth, "Healthy"))
+            default_index = 0
+            try:
+                default_index = health_conditions.index(current_condition)
+            except (ValueError, IndexError):
+                default_index = 0
+
+            selected_condition = st.selectbox(
+                "Condition",
+                health_conditions,
+                index=default_index,
+                key=f"tooth_{edit_tooth}",
+                on_change=update_tooth,
+                args=(edit_tooth,)
+            )
+
+        # Store selected condition in session state for immediate visual updates
+        st.session_state[f"tooth_condition_{edit_tooth}"] = selected_condition
+
+        # Build the updated chart in one pass and diff it against the stored
+        # one with a single dict comparison — the common case (plain rerun,
+        # nothing edited) short-circuits without per-tooth branching
+        new_chart = {
+            tooth_number: st.session_state.get(f"tooth_condition_{tooth_number}",
+                                               dental_chart.get(tooth_number, "Healthy"))
+            for tooth_number in all_teeth
+        }
+        chart_changed = new_chart != dental_chart
+        if chart_changed:
+            # Auto-select the tooth that just transitioned to an unhealthy
+            # condition — diffed against the chart before it is updated, so
+            # pre-existing unhealthy teeth (or a sparse chart densifying to
+            # all-Healthy entries) never repoint the selection
+            unhealthy = next((tooth for tooth, condition in new_chart.items()
+                              if condition != "Healthy"
+                              and dental_chart.get(tooth, "Healthy") != condition), None)
+            dental_chart.update(new_chart)
+            if unhealthy is not None:
+                st.session_state.tooth_selected = unhealthy
 
     return dental_chart, chart_changed
 
@@ -462,15 +563,23 @@ def update_tooth(tooth_number):
 
 def get_currency_symbol(currency_code):
     """Return the appropriate currency symbol based on currency code."""
-    currency_symbols = {
-        "SAR": "SAR",
-        "INR": "₹"
-    }
-    return currency_symbols.get(currency_code, currency_code)
+    return _CURRENCY_SYMBOLS.get(currency_code, currency_code)
+
+
+_env_loaded = False
 
 
 def configure_cloudinary():
     """Configure Cloudinary using environment variables"""
+    import cloudinary
+
+    # Parse .env lazily and only once per process instead of on every
+    # module import
+    global _env_loaded
+    if not _env_loaded:
+        load_dotenv()
+        _env_loaded = True
+
     cloudinary.config(
         cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
         api_key=os.getenv('CLOUDINARY_API_KEY'),
@@ -480,30 +589,4 @@ def configure_cloudinary():
 
 
 def custom_css():
-    st.markdown("""
-        <style>
-            .stButton > button {
-                padding: 12px 8px;
-                font-size: 16px;
-                font-weight: 500;
-                border-radius: 8px;
-                transition: all 0.3s ease;
-                box-shadow: 0 2px 5px rgba(0, 0, 0, 0.1);
-            }
-
-            .stButton > button:hover {
-                transform: translateY(-2px);
-                box-shadow: 0 4px 8px rgba(0, 0, 0, 0.15);
-            }
-
-            .stButton > button svg {
-                height: 20px;
-                width: 20px;
-                margin-right: 6px;
-            }
-
-            .stAlert {
-                border-radius: 8px;
-            }
-        </style>
-    """, unsafe_allow_html=True)
+    st.markdown(_CUSTOM_CSS, unsafe_allow_html=True)